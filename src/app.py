@@ -1,189 +1,269 @@
-# streamlit_app.py
-import streamlit as st
-import asyncio
-import logging
-import pandas as pd
-import nest_asyncio # Needed for running asyncio in Streamlit's environment
-
-# Apply nest_asyncio early
-nest_asyncio.apply()
-
-import config
-from data_loader import DataLoader
-from gemini_client import GeminiClient
-from matching_service import MatchingService
-from visualization import display_match_results
-
-# --- Page Configuration ---
-st.set_page_config(
-    page_title=config.APP_TITLE,
-    layout="wide",
-    initial_sidebar_state="expanded",
-)
-
-logging.basicConfig(level=config.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# --- Caching ---
-@st.cache_resource # Cache resource objects like clients
-def get_gemini_client():
-    try:
-        return GeminiClient()
-    except ValueError as e:
-        st.error(f"Failed to initialize Gemini Client: {e}. Please check API Key in .env file.")
-        return None
-    except Exception as e:
-        st.error(f"An unexpected error occurred initializing Gemini Client: {e}")
-        return None
-
-
-@st.cache_data # Cache data loading results
-def load_app_data():
-    data_loader = DataLoader()
-    success = data_loader.load_all_data()
-    if not success:
-        st.error("Failed to load necessary data (Founders or Investors). Please check CSV files and logs.")
-        return None, None, {} # Return empty structure
-    founders_df, investors_df = data_loader.get_data()
-    founder_options = data_loader.get_founder_options()
-    if not founder_options:
-        st.warning("No founders found in the data file.")
-    return founders_df, investors_df, founder_options
-
-# --- Main App Logic ---
-st.title(config.APP_TITLE)
-st.markdown("Select a founder to find potential investor matches based on AI analysis.")
-
-# --- Load Data and Initialize Services ---
-founders_df, investors_df, founder_options = load_app_data()
-gemini_client = get_gemini_client()
-
-if founders_df is not None and investors_df is not None and founder_options and gemini_client:
-    matcher = MatchingService(founders_df, investors_df, gemini_client)
-
-    # --- Sidebar ---
-    st.sidebar.header("Select Founder")
-    selected_founder_id = st.sidebar.selectbox(
-        "Choose a Founder:",
-        options=list(founder_options.keys()),
-        format_func=lambda x: founder_options.get(x, "Unknown ID"),
-        index=0
-    )
-    top_n_slider = st.sidebar.slider(
-        "Number of top matches to display:",
-        min_value=1,
-        max_value=20,
-        value=config.DEFAULT_TOP_N,
-        step=1
-    )
-    find_matches_button = st.sidebar.button("Find Matches", type="primary")
-
-    # --- Main Area ---
-    results_placeholder = st.empty()
-
-    if find_matches_button and selected_founder_id:
-        selected_founder_name = founders_df[founders_df['startup_id'] == selected_founder_id].iloc[0].get('startup_name', selected_founder_id)
-
-        with results_placeholder, st.spinner(f"Analyzing matches for {selected_founder_name}... Please wait."):
-            try:
-                matches = asyncio.run(matcher.find_matches(selected_founder_id))
-            except Exception as e:
-                matches = None # Ensure matches is None if async call fails
-                st.error(f"An error occurred during matching API calls: {e}")
-                logging.error(f"Error during matching for {selected_founder_id}: {e}", exc_info=True)
-
-        # --- Visualization Logic Moved Here ---
-        results_placeholder.empty() # Clear spinner area
-
-        st.subheader(f"🏆 Top Investor Matches for {selected_founder_name} ({selected_founder_id})")
-
-        # Optional Debugging (keep initially)
-        st.write("--- Debug Info (Inside App) ---")
-        st.write(f"Matches type: {type(matches)}")
-        if isinstance(matches, list):
-            st.write(f"Number of matches: {len(matches)}")
-            if matches: st.write("First match:", matches[0])
-        st.write("--- End Debug ---")
-
-        if matches is None:
-            # Error message already shown if exception occurred during run
-            if 'e' not in locals(): # Check if error object exists from try/except
-                 st.error(f"Match calculation failed or returned None for founder {selected_founder_id}.")
-        elif not matches:
-            st.info(f"No suitable investor matches found for founder {selected_founder_id} based on the criteria.")
-        else:
-            # Process and display the matches
-            try:
-                top_matches = matches[:top_n_slider]
-                num_found = len(matches)
-                num_to_display = len(top_matches)
-
-                st.write(f"Found {num_found} potential matches. Displaying top {num_to_display}.")
-
-                df_data = []
-                if top_matches:
-                    for i, match in enumerate(top_matches):
-                        if isinstance(match, dict):
-                            df_data.append({
-                                "Rank": i + 1,
-                                "Investor Name": match.get('investor_name', 'N/A'),
-                                "Score": match.get('score'), # Handle None later
-                                "Reasoning": match.get('reasoning', 'N/A'),
-                                "Investor ID": match.get('investor_id', 'N/A'),
-                            })
-                        else:
-                             logging.warning(f"Skipping invalid match item (not a dict): {match}")
-
-                if not df_data:
-                    st.warning("Could not prepare any data for the results table.")
-                else:
-                    results_df = pd.DataFrame(df_data)
-
-                    # Clean Score column before display configuration
-                    if 'Score' in results_df.columns:
-                         results_df['Score'] = pd.to_numeric(results_df['Score'], errors='coerce').fillna(0).astype(int)
-                    else:
-                         st.error("Internal Error: 'Score' column missing in results data.")
-                         st.dataframe(results_df) # Show raw data
-                         st.stop() # Stop further processing if score is missing
-
-
-                    # Display DataFrame using st.dataframe
-                    st.dataframe(
-                        results_df,
-                        column_config={
-                             "Rank": st.column_config.NumberColumn(label="🏆 Rank", width="small", format="%d"),
-                             "Score": st.column_config.ProgressColumn(
-                                label="💯 Score (/100)", width="medium", format="%d", min_value=0, max_value=100,
-                             ),
-                             "Reasoning": st.column_config.TextColumn(label="📝 Reasoning", width="large"),
-                             "Investor Name": st.column_config.TextColumn(label="👤 Investor Name", width="medium"),
-                             "Investor ID": st.column_config.TextColumn(label="🆔 Investor ID", width="medium")
-                         },
-                        hide_index=True,
-                        use_container_width=True
-                    )
-
-            except Exception as display_e:
-                st.error(f"An error occurred while displaying results: {display_e}")
-                logging.error(f"Error displaying results: {display_e}", exc_info=True)
-                # Optionally show raw matches list if DataFrame display fails
-                st.write("Raw Matches Data:")
-                st.json(matches[:top_n_slider]) # Display raw JSON if table fails
-
-
-    else:
-         # This message shows only if the button hasn't been pressed yet
-         if not find_matches_button:
-              results_placeholder.info("Select a founder and click 'Find Matches' in the sidebar.")
-         # If button was pressed but selected_founder_id was somehow invalid (shouldn't happen with selectbox)
-         elif find_matches_button and not selected_founder_id:
-              results_placeholder.warning("Please select a valid founder.")
-
-
-elif not config.API_KEY:
-     st.error("GEMINI_API_KEY is not set. Please configure it in the .env file.")
-else:
-    st.warning("Application could not start. Please check data files and API key configuration. Check terminal/logs for specific errors during data loading.")
-
-st.sidebar.markdown("---")
-st.sidebar.info("Powered by Google Gemini & Streamlit")
+# streamlit_app.py
+import os
+import streamlit as st
+import asyncio
+import heapq
+import logging
+import numpy as np
+import pandas as pd
+import nest_asyncio # Needed for running asyncio in Streamlit's environment
+
+# Apply nest_asyncio early
+nest_asyncio.apply()
+
+import config
+from data_loader import DataLoader
+from visualization import display_match_results
+# GeminiClient and MatchingService are imported lazily below: they pull in the
+# Gemini SDK (gRPC/protobuf), which is too heavy to pay on every first paint.
+
+# --- Page Configuration ---
+st.set_page_config(
+    page_title=config.APP_TITLE,
+    layout="wide",
+    initial_sidebar_state="expanded",
+)
+
+# Single logging setup for the whole app; guarded so Streamlit reruns and
+# module re-imports don't reconfigure the root logger.
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=config.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# --- Caching ---
+@st.cache_resource # Cache resource objects like clients
+def get_gemini_client():
+    from gemini_client import GeminiClient # deferred: cost is paid once per server lifetime
+    try:
+        return GeminiClient()
+    except ValueError as e:
+        st.error(f"Failed to initialize Gemini Client: {e}. Please check API Key in .env file.")
+        return None
+    except Exception as e:
+        st.error(f"An unexpected error occurred initializing Gemini Client: {e}")
+        return None
+
+
+# cache_resource returns the frames by reference instead of repickling a copy
+# on every rerun. Callers MUST treat the returned DataFrames as immutable
+# (never assign into them); .copy() at the mutation site if that ever changes.
+@st.cache_resource
+def load_app_data():
+    data_loader = DataLoader()
+    success = data_loader.load_all_data()
+    if not success:
+        st.error("Failed to load necessary data (Founders or Investors). Please check CSV files and logs.")
+        return None, None, {} # Return empty structure
+    founders_df, investors_df = data_loader.get_data()
+    founder_options = data_loader.get_founder_options()
+    if not founder_options:
+        st.warning("No founders found in the data file.")
+    return founders_df, investors_df, founder_options
+
+@st.cache_resource(show_spinner=False)
+def get_matching_service(data_sig: str, _founders_df, _investors_df, _gemini_client):
+    """One MatchingService per dataset. The constructor does O(N) work
+    (investor validation, records/index conversion, tokenization), so building
+    it on every rerun would pay that on each widget interaction; keying on the
+    data signature rebuilds it only when the CSVs change."""
+    from matching_service import MatchingService # deferred alongside the Gemini SDK
+    return MatchingService(_founders_df, _investors_df, _gemini_client)
+
+
+@st.cache_resource(show_spinner=False) # One long-lived loop per server, not per click
+def _make_loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False) # Cache match results per founder
+def compute_matches(founder_id: str, founder_label: str, data_sig: str, top_n: int, _matcher) -> list:
+    """Runs the async matching for a founder, drawing its own progress UI.
+
+    Cached so repeat requests for the same founder (and unchanged data/top_n,
+    both part of the cache key) skip the Gemini calls entirely; the per-pair
+    disk cache still absorbs most of the cost when only top_n changes. Runs
+    where every analysis failed raise (from find_matches), so an outage-shaped
+    empty result is never cached for the hour.
+    The status/scoreboard containers MUST be created in here: st.cache_data
+    records element calls and replays them on cache hits, and calls against
+    containers created outside the cached function raise
+    CacheReplayClosureError on every hit.
+    Reuses the session's cached event loop instead of creating/closing one per call,
+    which avoids 'Event loop is closed' races across reruns."""
+    status = st.status(f"Analyzing matches for {founder_label}...")
+    partial_results = st.empty() # rolling scoreboard while scoring runs
+
+    def _report_progress(completed: int, total: int):
+        status.update(label=f"Scoring investors... {completed}/{total} requests complete")
+
+    def _show_partial(match: dict, matches_so_far: list):
+        # Heap-select the top K instead of re-sorting the whole list on
+        # every completed task: O(N log K) per update, not O(N log N).
+        top_so_far = heapq.nlargest(top_n, matches_so_far, key=lambda m: m["score"])
+        partial_results.dataframe(
+            pd.DataFrame(top_so_far, columns=["investor_name", "score", "reasoning"]),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    try:
+        matches = st.session_state["event_loop"].run_until_complete(
+            _matcher.find_matches(founder_id, progress_callback=_report_progress,
+                                  on_match=_show_partial, top_n=top_n))
+        status.update(label="Scoring complete.", state="complete")
+    except Exception:
+        status.update(label="Matching failed.", state="error")
+        raise
+    finally:
+        partial_results.empty() # the final results table supersedes the scoreboard
+    return matches
+
+# --- Main App Logic ---
+st.title(config.APP_TITLE)
+st.markdown("Select a founder to find potential investor matches based on AI analysis.")
+
+# --- Load Data and Initialize Services ---
+if "event_loop" not in st.session_state:
+    st.session_state["event_loop"] = _make_loop()
+
+founders_df, investors_df, founder_options = load_app_data()
+gemini_client = get_gemini_client()
+
+if founders_df is not None and investors_df is not None and founder_options and gemini_client:
+    # Cheap signature so the cached service and match results invalidate when
+    # the CSVs change
+    data_sig = f"{len(founders_df)}_{len(investors_df)}"
+    matcher = get_matching_service(data_sig, founders_df, investors_df, gemini_client)
+
+    # --- Sidebar ---
+    st.sidebar.header("Select Founder")
+    selected_founder_id = st.sidebar.selectbox(
+        "Choose a Founder:",
+        options=list(founder_options.keys()),
+        format_func=lambda x: founder_options.get(x, "Unknown ID"),
+        index=0
+    )
+    top_n_slider = st.sidebar.slider(
+        "Number of top matches to display:",
+        min_value=1,
+        max_value=20,
+        value=config.DEFAULT_TOP_N,
+        step=1
+    )
+    find_matches_button = st.sidebar.button("Find Matches", type="primary")
+
+    # --- Main Area ---
+    results_placeholder = st.empty()
+
+    if find_matches_button and selected_founder_id:
+        founder_row = founders_df.loc[selected_founder_id] # O(1) indexed lookup
+        if isinstance(founder_row, pd.DataFrame): # duplicate IDs: take the first
+            founder_row = founder_row.iloc[0]
+        selected_founder_name = founder_row.get('startup_name', selected_founder_id)
+
+        results_placeholder.empty() # Clear the idle hint; progress UI lives in compute_matches
+
+        try:
+            matches = compute_matches(selected_founder_id, selected_founder_name, data_sig, top_n_slider, matcher)
+        except Exception as e:
+            matches = None # Ensure matches is None if async call fails
+            st.error(f"An error occurred during matching API calls: {e}")
+            logger.error(f"Error during matching for {selected_founder_id}: {e}", exc_info=True)
+
+        st.subheader(f"🏆 Top Investor Matches for {selected_founder_name} ({selected_founder_id})")
+
+        # Optional Debugging, gated so the production path skips the extra
+        # websocket round-trips these st.write calls cost
+        if os.getenv('APP_DEBUG') == '1':
+            st.write("--- Debug Info (Inside App) ---")
+            st.write(f"Matches type: {type(matches)}")
+            if isinstance(matches, list):
+                st.write(f"Number of matches: {len(matches)}")
+                if matches: st.write("First match:", matches[0])
+            st.write("--- End Debug ---")
+
+        if matches is None:
+            # Error message already shown if exception occurred during run
+            if 'e' not in locals(): # Check if error object exists from try/except
+                 st.error(f"Match calculation failed or returned None for founder {selected_founder_id}.")
+        elif not matches:
+            st.info(f"No suitable investor matches found for founder {selected_founder_id} based on the criteria.")
+        else:
+            # Process and display the matches
+            try:
+                top_matches = matches[:top_n_slider]
+                num_found = len(matches)
+                num_to_display = len(top_matches)
+
+                st.write(f"Found {num_found} potential matches. Displaying top {num_to_display}.")
+
+                # One-shot construction from the match dicts via pandas' C
+                # constructor instead of a per-row Python loop.
+                valid_matches = [m for m in top_matches if isinstance(m, dict)]
+                if len(valid_matches) < len(top_matches):
+                    logger.warning(f"Skipping {len(top_matches) - len(valid_matches)} invalid match item(s) (not dicts).")
+
+                if not valid_matches:
+                    st.warning("Could not prepare any data for the results table.")
+                else:
+                    results_df = pd.DataFrame.from_records(
+                        valid_matches, columns=['investor_name', 'score', 'reasoning', 'investor_id'])
+                    results_df.columns = ['Investor Name', 'Score', 'Reasoning', 'Investor ID']
+                    results_df.insert(0, 'Rank', np.arange(1, len(results_df) + 1))
+
+                    # Clean Score column before display configuration.
+                    # Scores fit in 0-100, so uint8 plus Arrow-backed reasoning
+                    # strings keep the Arrow payload Streamlit ships to the
+                    # browser (and any cached pickle) as small as possible.
+                    if 'Score' in results_df.columns:
+                         results_df['Score'] = pd.to_numeric(results_df['Score'], errors='coerce').fillna(0).clip(0, 100).astype('uint8')
+                         if 'Reasoning' in results_df.columns:
+                              results_df['Reasoning'] = results_df['Reasoning'].astype('string[pyarrow]')
+                    else:
+                         st.error("Internal Error: 'Score' column missing in results data.")
+                         st.dataframe(results_df) # Show raw data
+                         st.stop() # Stop further processing if score is missing
+
+
+                    # Display DataFrame using st.dataframe
+                    st.dataframe(
+                        results_df,
+                        column_config={
+                             "Rank": st.column_config.NumberColumn(label="🏆 Rank", width="small", format="%d"),
+                             "Score": st.column_config.ProgressColumn(
+                                label="💯 Score (/100)", width="medium", format="%d", min_value=0, max_value=100,
+                             ),
+                             "Reasoning": st.column_config.TextColumn(label="📝 Reasoning", width="large"),
+                             "Investor Name": st.column_config.TextColumn(label="👤 Investor Name", width="medium"),
+                             "Investor ID": st.column_config.TextColumn(label="🆔 Investor ID", width="medium")
+                         },
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+            except Exception as display_e:
+                st.error(f"An error occurred while displaying results: {display_e}")
+                logger.error(f"Error displaying results: {display_e}", exc_info=True)
+                # Optionally show raw matches list if DataFrame display fails
+                st.write("Raw Matches Data:")
+                st.json(matches[:top_n_slider]) # Display raw JSON if table fails
+
+
+    else:
+         # This message shows only if the button hasn't been pressed yet
+         if not find_matches_button:
+              results_placeholder.info("Select a founder and click 'Find Matches' in the sidebar.")
+         # If button was pressed but selected_founder_id was somehow invalid (shouldn't happen with selectbox)
+         elif find_matches_button and not selected_founder_id:
+              results_placeholder.warning("Please select a valid founder.")
+
+
+elif not config.API_KEY:
+     st.error("GEMINI_API_KEY is not set. Please configure it in the .env file.")
+else:
+    st.warning("Application could not start. Please check data files and API key configuration. Check terminal/logs for specific errors during data loading.")
+
+st.sidebar.markdown("---")
+st.sidebar.info("Powered by Google Gemini & Streamlit")
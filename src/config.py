@@ -10,12 +10,27 @@ INVESTORS_FILE = "../data/investors1.csv"
 # --- Gemini API ---
 API_KEY = os.getenv("GEMINI_API_KEY")
 GENERATIVE_MODEL_NAME = "gemini-1.5-flash-latest" # or "gemini-pro"
+# SDK transport ('rest', 'grpc' or 'grpc_asyncio'); leave unset to let the SDK choose.
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT") or None
+
+# --- Response Caching ---
+RESPONSE_CACHE_DIR = "./.match_cache"
+RESPONSE_CACHE_TTL_SECONDS = 86400  # 24h; pair scores rarely change faster than the CSVs
 
 # --- Rate Limiting & Retry ---
-MAX_CONCURRENT_REQUESTS = 5 
+MAX_CONCURRENT_REQUESTS = int(os.getenv("GEMINI_CONCURRENCY", os.getenv("MAX_CONCURRENT_REQUESTS", "16")))
+REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_RPM", "60"))  # token-bucket pacing for the API
 RETRY_ATTEMPTS = 3
+# Upper bound for a single in-flight generate call (concurrency slot held).
+REQUEST_TIMEOUT_SECONDS = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "120"))
+MATCH_BATCH_SIZE = int(os.getenv("MATCH_BATCH_SIZE", "10"))  # investors per Gemini request; 1 = one call per pair
 INITIAL_RETRY_DELAY_SECONDS = 5 
 
+# --- Matching ---
+PREFILTER_INVESTORS = os.getenv("PREFILTER_INVESTORS", "1") != "0"  # structural prefilter before LLM calls
+PRERANK_INVESTORS = os.getenv("PRERANK_INVESTORS", "1") != "0"  # lexical pre-ranking before LLM calls
+PRERANK_MULTIPLIER = int(os.getenv("PRERANK_MULTIPLIER", "4"))  # candidates kept = multiplier * DEFAULT_TOP_N
+
 # --- Streamlit App ---
 DEFAULT_TOP_N = 5
 APP_TITLE = "AI Founder-Investor Matcher"
@@ -1,152 +1,467 @@
-# gemini_client.py
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
-import asyncio
-import json
-import logging
-from typing import Dict, Tuple, Optional, Any
-import pandas as pd
-
-import config
-
-logging.basicConfig(level=config.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
-
-class GeminiClient:
-    """Handles configuration and interaction with the Google Gemini API."""
-
-    def __init__(self):
-        if not config.API_KEY:
-            raise ValueError("Gemini API Key not found in environment/config.")
-        try:
-            genai.configure(api_key=config.API_KEY)
-            self.model = genai.GenerativeModel(config.GENERATIVE_MODEL_NAME)
-            self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
-            logging.info(f"GeminiClient initialized with model: {config.GENERATIVE_MODEL_NAME}")
-        except Exception as e:
-            logging.error(f"Failed to configure Gemini API: {e}")
-            raise
-
-    def create_match_prompt(self, founder_data: pd.Series, investor_data: pd.Series) -> str:
-        """Creates the detailed prompt for evaluating a founder-investor pair."""
-        # (This prompt generation logic is copied directly from the previous version)
-        investor_industries = ", ".join(investor_data.get('preferred_industries', '').split('|'))
-        investor_stages = ", ".join(investor_data.get('preferred_stages', '').split('|'))
-        founder_industries = ", ".join(founder_data.get('industry', '').split('|'))
-        founder_business_models = ", ".join(founder_data.get('business_model', '').split('|'))
-
-        prompt = f"""
-        Analyze the compatibility between the following Startup Founder and Investor. Provide a match score from 0 to 100 and a brief justification.
-
-        **Context:** You are an expert Venture Capital analyst specialized in matching startups with the right investors.
-
-        **Startup Founder Profile:**
-        - Name: {founder_data.get('startup_name', 'N/A')}
-        - Industry: {founder_industries}
-        - Stage: {founder_data.get('startup_stage', 'N/A')}
-        - Funding Required (USD): ${founder_data.get('funding_required_usd', 0):,}
-        - Location: {founder_data.get('location_city', 'N/A')}, {founder_data.get('location_country', 'N/A')}
-        - Business Model: {founder_business_models}
-        - MRR (USD): ${founder_data.get('mrr_usd', 0):,}
-        - User Count: {founder_data.get('user_count', 0)}
-        - Team Size: {founder_data.get('team_size', 'N/A')}
-        - Product Description: {founder_data.get('product_description', 'N/A')}
-        - Unique Selling Proposition (USP): {founder_data.get('usp', 'N/A')}
-        - Traction Summary: {founder_data.get('traction_summary', 'N/A')}
-
-        **Investor Profile:**
-        - Name: {investor_data.get('investor_name', 'N/A')} ({investor_data.get('investor_type', 'N/A')})
-        - Preferred Industries: {investor_industries}
-        - Investment Range (USD): ${investor_data.get('min_investment_usd', 0):,} - ${investor_data.get('max_investment_usd', 0):,}
-        - Average Check Size (USD): ${investor_data.get('check_size_avg_usd', 0):,}
-        - Preferred Stages: {investor_stages}
-        - Geographic Focus: {investor_data.get('geographic_focus', 'N/A')}
-        - Investment Thesis: {investor_data.get('investment_thesis', 'N/A')}
-        - Example Portfolio Companies: {investor_data.get('portfolio_companies', 'N/A')}
-
-        **Task:**
-        Evaluate the match based on the following criteria:
-        1.  Industry Fit: Does the startup's industry align with the investor's preferences?
-        2.  Stage Fit: Does the startup's current stage match the investor's preferred investment stages?
-        3.  Funding/Check Size Fit: Is the startup's required funding within the investor's typical investment range or average check size?
-        4.  Geographic Focus: Does the startup's location align with the investor's geographic preferences?
-        5.  Qualitative Fit: Consider the alignment between the startup's product, traction, USP, and business model with the investor's thesis and past investments. Is there a strategic or thesis-driven reason for this investor to be interested?
-
-        **Output Format:**
-        Return your response ONLY as a JSON object with the following structure:
-        {{
-          "score": <integer between 0 and 100>,
-          "reasoning": "<string explaining the score based on the criteria>"
-        }}
-
-        **Scoring Guidance:**
-        - 85-100: Excellent fit across most key criteria, strong qualitative alignment.
-        - 70-84: Good fit, alignment on major criteria (e.g., industry, stage), reasonable qualitative fit.
-        - 50-69: Partial fit, alignment on some criteria but mismatches on others (e.g., stage or check size slightly off, thesis alignment is okay but not perfect).
-        - 25-49: Weak fit, significant mismatches in core criteria (e.g., wrong industry, wrong stage).
-        - 0-24: Poor fit, fundamental mismatches across most criteria.
-
-        Now, provide the JSON output for the match between {founder_data.get('startup_name', 'this startup')} and {investor_data.get('investor_name', 'this investor')}.
-        """
-        return prompt
-
-
-    async def get_match_analysis(self, prompt: str, investor_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
-        """
-        Calls the Gemini API asynchronously, respecting semaphore and retries.
-        Returns the investor_id and the parsed JSON response or None on failure.
-        """
-        retries = config.RETRY_ATTEMPTS
-        delay = float(config.INITIAL_RETRY_DELAY_SECONDS)
-        last_exception = None
-
-        async with self.semaphore: # Acquire semaphore
-            for attempt in range(retries + 1):
-                try:
-                    await asyncio.sleep(0.1 * attempt) # Small stagger delay
-                    logging.debug(f"API Call Attempt {attempt+1}/{retries+1} for investor {investor_id}")
-                    response = await self.model.generate_content_async(prompt)
-
-                    if not response.parts:
-                         try: # Check for safety blocks
-                            if response.prompt_feedback.block_reason:
-                                logging.warning(f"Request for investor {investor_id} blocked. Reason: {response.prompt_feedback.block_reason}")
-                                return investor_id, None
-                         except Exception: pass # Ignore if feedback structure absent
-                         logging.warning(f"Empty response for investor {investor_id} (Attempt {attempt+1}).")
-                         return investor_id, None # Don't retry empty
-
-                    raw_text = response.text
-                    if raw_text.strip().startswith("```json"):
-                        raw_text = raw_text.strip()[7:-3].strip()
-                    elif raw_text.strip().startswith("```"):
-                        raw_text = raw_text.strip()[3:-3].strip()
-
-                    try:
-                        match_data = json.loads(raw_text)
-                        if isinstance(match_data, dict) and "score" in match_data and "reasoning" in match_data and isinstance(match_data['score'], int):
-                            logging.info(f"Success for investor {investor_id} (Attempt {attempt+1})")
-                            return investor_id, match_data
-                        else:
-                            logging.warning(f"Malformed JSON structure for investor {investor_id}. Data: {match_data}")
-                            return investor_id, None
-                    except json.JSONDecodeError:
-                        logging.error(f"JSON Decode Error for investor {investor_id}. Raw: {raw_text}")
-                        return investor_id, None
-
-                except google_exceptions.ResourceExhausted as e:
-                    last_exception = e
-                    if attempt < retries:
-                        logging.warning(f"Rate limit (429) for investor {investor_id} (Attempt {attempt+1}). Retrying in {delay:.2f}s...")
-                        await asyncio.sleep(delay)
-                        delay *= 2 # Exponential backoff
-                    else:
-                        logging.error(f"Rate limit (429) for investor {investor_id}. Max retries exceeded.")
-                    continue # Next attempt or finish loop
-
-                except Exception as e:
-                    last_exception = e
-                    logging.error(f"API Error for investor {investor_id} (Attempt {attempt+1}): {type(e).__name__} - {e}")
-                    break # Break on non-429 errors
-
-            logging.error(f"Failed API call for investor {investor_id} after {retries+1} attempts. Last error: {last_exception or 'Unknown'}")
-            return investor_id, None
\ No newline at end of file
+# gemini_client.py
+import asyncio
+import hashlib
+import logging
+import random
+import re
+from typing import Dict, Tuple, Optional, Any
+import diskcache
+import msgspec
+import orjson
+import pandas as pd
+from aiolimiter import AsyncLimiter
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# The Gemini SDK drags in gRPC/protobuf (~100-300ms); defer it so merely
+# importing this module (e.g. on Streamlit first paint) stays cheap.
+genai = None
+google_exceptions = None
+
+
+def _import_genai():
+    """Imports the Gemini SDK on first client construction, not at module load."""
+    global genai, google_exceptions
+    if genai is None:
+        import google.generativeai as genai_module
+        from google.api_core import exceptions as google_exceptions_module
+        genai = genai_module
+        google_exceptions = google_exceptions_module
+
+# Extracts the JSON object from a response regardless of markdown fencing.
+_JSON_RE = re.compile(rb'\{.*\}', re.S)
+# Same, for the JSON array returned by batch prompts.
+_JSON_ARRAY_RE = re.compile(rb'\[.*\]', re.S)
+
+
+class MatchResult(msgspec.Struct):
+    """Expected shape of a single pair analysis; decoded and type-checked in one C pass."""
+    score: int
+    reasoning: str
+
+
+_MATCH_DECODER = msgspec.json.Decoder(MatchResult)
+
+
+def _digest(payload: bytes) -> str:
+    """Hex digest for cache keys. blake2b is markedly faster than sha256 on
+    prompt-sized inputs, and 128 bits is ample for collision resistance here."""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+# Static single-pair evaluation instructions. Placed ahead of the investor
+# block so the stable prompt prefix (founder + instructions) is as long as
+# possible for provider-side caching.
+_PAIR_INSTRUCTIONS = """
+        **Task:**
+        Evaluate the match between the startup above and the investor described below, based on the following criteria:
+        1.  Industry Fit: Does the startup's industry align with the investor's preferences?
+        2.  Stage Fit: Does the startup's current stage match the investor's preferred investment stages?
+        3.  Funding/Check Size Fit: Is the startup's required funding within the investor's typical investment range or average check size?
+        4.  Geographic Focus: Does the startup's location align with the investor's geographic preferences?
+        5.  Qualitative Fit: Consider the alignment between the startup's product, traction, USP, and business model with the investor's thesis and past investments. Is there a strategic or thesis-driven reason for this investor to be interested?
+
+        **Output Format:**
+        Return your response ONLY as a JSON object with the following structure:
+        {
+          "score": <integer between 0 and 100>,
+          "reasoning": "<string explaining the score based on the criteria>"
+        }
+
+        **Scoring Guidance:**
+        - 85-100: Excellent fit across most key criteria, strong qualitative alignment.
+        - 70-84: Good fit, alignment on major criteria (e.g., industry, stage), reasonable qualitative fit.
+        - 50-69: Partial fit, alignment on some criteria but mismatches on others (e.g., stage or check size slightly off, thesis alignment is okay but not perfect).
+        - 25-49: Weak fit, significant mismatches in core criteria (e.g., wrong industry, wrong stage).
+        - 0-24: Poor fit, fundamental mismatches across most criteria.
+"""
+
+class GeminiClient:
+    """Handles configuration and interaction with the Google Gemini API."""
+
+    # Investor columns the prompt builders read. Callers can subset their
+    # investor frames to these (plus whatever they need themselves) without
+    # changing prompt output.
+    prompt_columns = ('investor_id', 'investor_name', 'investor_type',
+                      'preferred_industries', 'preferred_stages',
+                      'min_investment_usd', 'max_investment_usd', 'check_size_avg_usd',
+                      'geographic_focus', 'investment_thesis', 'portfolio_companies')
+
+    def __init__(self):
+        if not config.API_KEY:
+            raise ValueError("Gemini API Key not found in environment/config.")
+        _import_genai()
+        try:
+            genai.configure(api_key=config.API_KEY, transport=config.GEMINI_TRANSPORT)
+            # One GenerativeModel for the whole process: all concurrent calls
+            # share its underlying channel, so connections stay warm instead of
+            # paying TLS/TCP setup per burst. The client itself is held as a
+            # st.cache_resource singleton by the app for the same reason.
+            self.model = genai.GenerativeModel(config.GENERATIVE_MODEL_NAME)
+            self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
+            self.rate_limiter = AsyncLimiter(config.REQUESTS_PER_MINUTE, 60)
+            self.response_cache = diskcache.Cache(config.RESPONSE_CACHE_DIR)
+            logger.info(f"GeminiClient initialized with model: {config.GENERATIVE_MODEL_NAME}")
+        except Exception as e:
+            logger.error(f"Failed to configure Gemini API: {e}")
+            raise
+
+    def close(self) -> None:
+        """Releases held resources (currently the disk cache handle).
+
+        The SDK owns and pools its transport connections, so there is no HTTP
+        session of our own to close here."""
+        self.response_cache.close()
+
+    def build_founder_header(self, founder_data) -> str:
+        """Builds the context + founder block of the match prompt.
+
+        This block is identical for every investor, so callers should build it
+        once per founder and reuse it across the whole fan-out instead of
+        re-rendering it per pair.
+        """
+        founder = dict(founder_data) # plain dict lookups are cheaper than Series.get in hot paths
+        founder_industries = ", ".join(str(founder.get('industry', '')).split('|'))
+        founder_business_models = ", ".join(str(founder.get('business_model', '')).split('|'))
+
+        return f"""
+        Analyze the compatibility between the following Startup Founder and Investor. Provide a match score from 0 to 100 and a brief justification.
+
+        **Context:** You are an expert Venture Capital analyst specialized in matching startups with the right investors.
+
+        **Startup Founder Profile:**
+        - Name: {founder.get('startup_name', 'N/A')}
+        - Industry: {founder_industries}
+        - Stage: {founder.get('startup_stage', 'N/A')}
+        - Funding Required (USD): ${founder.get('funding_required_usd', 0):,}
+        - Location: {founder.get('location_city', 'N/A')}, {founder.get('location_country', 'N/A')}
+        - Business Model: {founder_business_models}
+        - MRR (USD): ${founder.get('mrr_usd', 0):,}
+        - User Count: {founder.get('user_count', 0)}
+        - Team Size: {founder.get('team_size', 'N/A')}
+        - Product Description: {founder.get('product_description', 'N/A')}
+        - Unique Selling Proposition (USP): {founder.get('usp', 'N/A')}
+        - Traction Summary: {founder.get('traction_summary', 'N/A')}
+        """
+
+    def build_investor_profile(self, investor_data) -> str:
+        """Renders just the investor profile block, without task instructions."""
+        investor = dict(investor_data)
+        investor_industries = ", ".join(str(investor.get('preferred_industries', '')).split('|'))
+        investor_stages = ", ".join(str(investor.get('preferred_stages', '')).split('|'))
+
+        return f"""
+        **Investor Profile:**
+        - Name: {investor.get('investor_name', 'N/A')} ({investor.get('investor_type', 'N/A')})
+        - Preferred Industries: {investor_industries}
+        - Investment Range (USD): ${investor.get('min_investment_usd', 0):,} - ${investor.get('max_investment_usd', 0):,}
+        - Average Check Size (USD): ${investor.get('check_size_avg_usd', 0):,}
+        - Preferred Stages: {investor_stages}
+        - Geographic Focus: {investor.get('geographic_focus', 'N/A')}
+        - Investment Thesis: {investor.get('investment_thesis', 'N/A')}
+        - Example Portfolio Companies: {investor.get('portfolio_companies', 'N/A')}
+        """
+
+    def build_investor_tail(self, investor_data, founder_name: str = 'this startup') -> str:
+        """Builds the investor-specific remainder of the single-pair match prompt.
+
+        The static task/scoring instructions lead the tail, so the full prompt
+        orders as founder block + instructions + investor block: everything
+        before the investor profile is byte-identical across a founder's whole
+        fan-out and thus eligible for provider-side prompt (prefix) caching."""
+        investor = dict(investor_data)
+
+        return _PAIR_INSTRUCTIONS + self.build_investor_profile(investor) + f"""
+        Now, provide the JSON output for the match between {founder_name} and {investor.get('investor_name', 'this investor')}.
+        """
+
+    def build_prompts_vectorized(self, founder_data, investors_df: pd.DataFrame) -> list:
+        """Materializes (investor_id, prompt) pairs for a whole investor frame up front.
+
+        Pre-splits the pipe-delimited preference columns in one vectorized pass
+        and iterates plain tuples instead of per-row Series, which keeps the
+        Python-level work per investor to a couple of dict operations."""
+        founder = dict(founder_data)
+        founder_name = founder.get('startup_name', 'this startup')
+        header = self.build_founder_header(founder)
+
+        df = investors_df.copy()
+        for col in ('preferred_industries', 'preferred_stages'):
+            if col in df.columns:
+                # One C-level pass; build_investor_tail's per-row split becomes a no-op.
+                df[col] = df[col].astype(str).str.replace('|', ', ', regex=False)
+
+        columns = list(df.columns)
+        prompts = []
+        for row in df.itertuples(index=False, name=None):
+            investor = dict(zip(columns, row))
+            investor_id = str(investor.get('investor_id', '')).strip()
+            if not investor_id:
+                continue
+            prompts.append((investor_id, header + self.build_investor_tail(investor, founder_name)))
+        return prompts
+
+    def create_match_prompt(self, founder_data: pd.Series, investor_data: pd.Series) -> str:
+        """Creates the full prompt for a single founder-investor pair.
+
+        Convenience wrapper for one-off calls; the fan-out path builds the
+        founder header once and appends per-investor tails."""
+        founder = dict(founder_data)
+        return self.build_founder_header(founder) + self.build_investor_tail(
+            investor_data, founder.get('startup_name', 'this startup'))
+
+
+    def content_fingerprint(self, investor_data) -> str:
+        """Stable hash of the prompt-relevant fields of an investor record.
+
+        Cache keys built from fingerprints let callers check the response cache
+        BEFORE rendering a prompt, so the string formatting is only paid on a
+        miss. Only prompt_columns participate, so unrelated column changes do
+        not invalidate cached scores."""
+        investor = dict(investor_data)
+        payload = {col: investor.get(col) for col in self.prompt_columns}
+        return _digest(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str))
+
+    async def get_match_analysis_pair(self, founder_header: str, founder_name: str,
+                                      investor_data, investor_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Scores one founder-investor pair, deferring prompt construction.
+
+        The cache key is derived from the founder header and the investor's
+        content fingerprint, so on a cache hit no prompt string is ever built."""
+        founder_fp = _digest(founder_header.encode())
+        cache_key = f"pair:{founder_fp}:{self.content_fingerprint(investor_data)}"
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Cache hit for investor {investor_id}")
+            return investor_id, cached
+
+        prompt = founder_header + self.build_investor_tail(investor_data, founder_name)
+        investor_id, match_data = await self._call_api(prompt, investor_id)
+        if match_data is not None:
+            self.response_cache.set(cache_key, match_data, expire=config.RESPONSE_CACHE_TTL_SECONDS)
+        return investor_id, match_data
+
+    async def get_match_analysis(self, prompt: str, investor_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Returns the investor_id and the parsed match analysis, or None on failure.
+        Results are cached on disk keyed by a hash of the exact prompt, so a
+        (founder, investor) pair scored recently skips the API call entirely.
+        """
+        cache_key = _digest(prompt.encode())
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Cache hit for investor {investor_id}")
+            return investor_id, cached
+
+        investor_id, match_data = await self._call_api(prompt, investor_id)
+        if match_data is not None:
+            self.response_cache.set(cache_key, match_data, expire=config.RESPONSE_CACHE_TTL_SECONDS)
+        return investor_id, match_data
+
+    async def _call_api(self, prompt: str, investor_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Calls the Gemini API for a single pair and parses the JSON object response.
+        Returns the investor_id and the parsed result or None on failure.
+        """
+        raw_text = await self._generate_text(prompt, f"investor {investor_id}")
+        if raw_text is None:
+            return investor_id, None
+
+        json_match = _JSON_RE.search(raw_text.encode())
+        if json_match is None:
+            logger.error(f"No JSON object found in response for investor {investor_id}. Raw: {raw_text}")
+            return investor_id, None
+
+        try:
+            match_data = _MATCH_DECODER.decode(json_match.group(0))
+        except msgspec.DecodeError:
+            logger.error(f"Malformed or undecodable JSON for investor {investor_id}. Raw: {raw_text}")
+            return investor_id, None
+
+        logger.info(f"Success for investor {investor_id}")
+        return investor_id, {"score": match_data.score, "reasoning": match_data.reasoning}
+
+    async def _generate_text(self, prompt: str, tag: str) -> Optional[str]:
+        """
+        Runs a rate-limited generate call with retries and exponential backoff.
+        Returns the raw response text, or None on block/empty/failure.
+        """
+        retries = config.RETRY_ATTEMPTS
+        delay = float(config.INITIAL_RETRY_DELAY_SECONDS)
+        last_exception = None
+
+        for attempt in range(retries + 1):
+            try:
+                logger.debug(f"API Call Attempt {attempt+1}/{retries+1} for {tag}")
+                # Hold a concurrency slot only for the API call itself; parsing
+                # and backoff sleeps must not starve other tasks of slots. The
+                # timeout starts here, with the slot held, so it bounds the
+                # in-flight call rather than queue wait behind the limiter.
+                async with self.semaphore:
+                    async with self.rate_limiter:
+                        response = await asyncio.wait_for(
+                            self.model.generate_content_async(prompt),
+                            timeout=config.REQUEST_TIMEOUT_SECONDS)
+
+                if not response.parts:
+                    try: # Check for safety blocks
+                        if response.prompt_feedback.block_reason:
+                            logger.warning(f"Request for {tag} blocked. Reason: {response.prompt_feedback.block_reason}")
+                            return None
+                    except Exception: pass # Ignore if feedback structure absent
+                    logger.warning(f"Empty response for {tag} (Attempt {attempt+1}).")
+                    return None # Don't retry empty
+
+                return response.text
+
+            except asyncio.TimeoutError as e:
+                last_exception = e
+                logger.warning(f"API call for {tag} timed out after "
+                               f"{config.REQUEST_TIMEOUT_SECONDS}s (Attempt {attempt+1}).")
+                continue # A hang is usually transient; retry without backoff
+
+            except google_exceptions.ResourceExhausted as e:
+                last_exception = e
+                if attempt < retries:
+                    # Jitter desynchronizes retries from sibling tasks throttled at the same moment.
+                    backoff = delay + random.uniform(0, delay * 0.1)
+                    logger.warning(f"Rate limit (429) for {tag} (Attempt {attempt+1}). Retrying in {backoff:.2f}s...")
+                    await asyncio.sleep(backoff)
+                    delay *= 2 # Exponential backoff
+                else:
+                    logger.error(f"Rate limit (429) for {tag}. Max retries exceeded.")
+                continue # Next attempt or finish loop
+
+            except Exception as e:
+                last_exception = e
+                logger.error(f"API Error for {tag} (Attempt {attempt+1}): {type(e).__name__} - {e}")
+                break # Break on non-429 errors
+
+        logger.error(f"Failed API call for {tag} after {retries+1} attempts. Last error: {last_exception or 'Unknown'}")
+        return None
+
+    def build_batch_prompt(self, founder_header: str, profiles: list) -> str:
+        """Builds one prompt asking Gemini to score several investors at once.
+
+        profiles is a list of (investor_id, profile_block) pairs; the model is
+        instructed to return a JSON array with one object per investor_id."""
+        profile_blocks = "\n".join(
+            f"\n        --- Investor (investor_id: {investor_id}) ---{profile}"
+            for investor_id, profile in profiles
+        )
+        return founder_header + f"""
+        **Investors to Evaluate:**
+        {profile_blocks}
+
+        **Task:**
+        For EACH investor listed above, evaluate the match against the startup based on the following criteria:
+        1.  Industry Fit: Does the startup's industry align with the investor's preferences?
+        2.  Stage Fit: Does the startup's current stage match the investor's preferred investment stages?
+        3.  Funding/Check Size Fit: Is the startup's required funding within the investor's typical investment range or average check size?
+        4.  Geographic Focus: Does the startup's location align with the investor's geographic preferences?
+        5.  Qualitative Fit: Consider the alignment between the startup's product, traction, USP, and business model with the investor's thesis and past investments.
+
+        **Output Format:**
+        Return your response ONLY as a JSON array with exactly one object per investor, in this structure:
+        [
+          {{
+            "investor_id": "<the investor_id given above>",
+            "score": <integer between 0 and 100>,
+            "reasoning": "<string explaining the score based on the criteria>"
+          }}
+        ]
+
+        **Scoring Guidance:**
+        - 85-100: Excellent fit across most key criteria, strong qualitative alignment.
+        - 70-84: Good fit, alignment on major criteria (e.g., industry, stage), reasonable qualitative fit.
+        - 50-69: Partial fit, alignment on some criteria but mismatches on others (e.g., stage or check size slightly off, thesis alignment is okay but not perfect).
+        - 25-49: Weak fit, significant mismatches in core criteria (e.g., wrong industry, wrong stage).
+        - 0-24: Poor fit, fundamental mismatches across most criteria.
+
+        Now, provide the JSON array covering every listed investor exactly once.
+        """
+
+    def _parse_batch_response(self, raw_text: str, investor_ids: list) -> Optional[list]:
+        """Parses a batch response into [(investor_id, result_dict_or_None), ...].
+
+        Returns None when no usable array could be extracted, so the caller can
+        fall back to per-pair requests."""
+        array_match = _JSON_ARRAY_RE.search(raw_text.encode())
+        if array_match is None:
+            return None
+        try:
+            items = orjson.loads(array_match.group(0))
+        except orjson.JSONDecodeError:
+            return None
+        if not isinstance(items, list):
+            return None
+
+        by_id = {}
+        for item in items:
+            if isinstance(item, dict) and isinstance(item.get('score'), int) and "reasoning" in item:
+                by_id[str(item.get('investor_id', '')).strip()] = {
+                    "score": item['score'],
+                    "reasoning": item['reasoning'],
+                }
+        if not by_id:
+            return None
+        return [(investor_id, by_id.get(investor_id)) for investor_id in investor_ids]
+
+    async def get_match_analysis_batch(self, founder_header: str, founder_name: str,
+                                       investors: list) -> list:
+        """
+        Scores a chunk of investors in a single Gemini request, amortizing one
+        network round trip over the whole chunk. investors is a list of
+        (investor_id, investor_record) pairs. Falls back to per-pair calls when
+        the batch response cannot be parsed. Results are disk-cached under the
+        same per-pair fingerprint keys as single-pair analyses, and only
+        successful analyses are ever cached: an investor the model omitted or
+        mangled in one batch response is retried on the next run instead of
+        staying negative-cached until the TTL expires.
+        """
+        if len(investors) == 1:
+            investor_id, record = investors[0]
+            return [await self.get_match_analysis_pair(founder_header, founder_name, record, investor_id)]
+
+        # Per-pair keys checked before any prompt rendering: cached pairs are
+        # served immediately and only the misses go into the batch prompt.
+        founder_fp = _digest(founder_header.encode())
+        cached_results = []
+        misses = []
+        for investor_id, record in investors:
+            pair_key = f"pair:{founder_fp}:{self.content_fingerprint(record)}"
+            cached = self.response_cache.get(pair_key)
+            if cached is not None:
+                cached_results.append((investor_id, cached))
+            else:
+                misses.append((investor_id, record, pair_key))
+        if not misses:
+            logger.debug(f"Cache hit for batch of {len(investors)} investors")
+            return cached_results
+
+        # Tag from the misses, not the original chunk, so rate-limit/failure
+        # logs reflect the request actually sent.
+        batch_tag = f"batch of {len(misses)} investors"
+
+        profiles = [(investor_id, self.build_investor_profile(record))
+                    for investor_id, record, _ in misses]
+        prompt = self.build_batch_prompt(founder_header, profiles)
+
+        raw_text = await self._generate_text(prompt, batch_tag)
+        results = None
+        if raw_text is not None:
+            results = self._parse_batch_response(raw_text, [investor_id for investor_id, _, _ in misses])
+
+        if results is None:
+            logger.warning(f"Batch analysis failed for {batch_tag}; falling back to per-pair calls.")
+            singles = [self.get_match_analysis_pair(founder_header, founder_name, record, investor_id)
+                       for investor_id, record, _ in misses]
+            return cached_results + list(await asyncio.gather(*singles))
+
+        pair_key_by_id = {investor_id: pair_key for investor_id, _, pair_key in misses}
+        for investor_id, match_data in results:
+            if match_data is not None:
+                self.response_cache.set(pair_key_by_id[investor_id], match_data,
+                                        expire=config.RESPONSE_CACHE_TTL_SECONDS)
+        return cached_results + results
\ No newline at end of file
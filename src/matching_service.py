@@ -1,193 +1,558 @@
-# # matching_service.py
-# import pandas as pd
-# import asyncio
-# import logging
-# from typing import List, Dict, Optional, Any
-
-# from data_loader import DataLoader
-# from gemini_client import GeminiClient
-
-# logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# class MatchingService:
-#     """Orchestrates the founder-investor matching process."""
-
-#     def __init__(self, data_loader: DataLoader, gemini_client: GeminiClient):
-#         self.data_loader = data_loader
-#         self.gemini_client = gemini_client
-#         self.founders_df, self.investors_df = self.data_loader.get_data()
-        
-
-#     async def find_matches(self, founder_id: str) -> Optional[List[Dict[str, Any]]]:
-#         """Finds, scores, and ranks investor matches for a given founder."""
-
-#         if self.founders_df is None or self.investors_df is None:
-#             logging.error("Data not loaded in MatchingService. Cannot find matches.")
-#             return None
-#         if self.investors_df.empty:
-#              logging.warning("No investors loaded. Cannot perform matching.")
-#              return []
-
-
-#         founder_row = self.founders_df[self.founders_df['startup_id'] == founder_id]
-#         if founder_row.empty:
-#             logging.error(f"Founder ID {founder_id} not found.")
-#             return None
-
-#         founder_data = founder_row.iloc[0]
-#         founder_name = founder_data.get('startup_name', founder_id)
-#         logging.info(f"--- Starting match process for Founder: {founder_name} ({founder_id}) ---")
-
-#         tasks = []
-#         investor_map = {} # Store investor data for result assembly
-
-#         for index, investor_data in self.investors_df.iterrows():
-#             investor_id = investor_data.get('investor_id')
-#             if not investor_id or str(investor_id).strip() == '':
-#                  logging.warning(f"Skipping investor row {index} due to invalid ID.")
-#                  continue
-
-#             investor_id = str(investor_id)
-#             investor_map[investor_id] = investor_data
-#             prompt = self.gemini_client.create_match_prompt(founder_data, investor_data)
-#             tasks.append(self.gemini_client.get_match_analysis(prompt, investor_id))
-
-#         if not tasks:
-#             logging.warning(f"No valid investors to match against for founder {founder_id}.")
-#             return []
-
-#         logging.info(f"Sending {len(tasks)} match requests to Gemini API...")
-#         results = await asyncio.gather(*tasks)
-#         logging.info("Received all Gemini responses.")
-
-#         # Process results
-#         matches = []
-#         successful_analyses = 0
-#         failed_analyses = 0
-#         for investor_id, analysis_result in results:
-#             if analysis_result and isinstance(analysis_result.get('score'), int):
-#                 investor_info = investor_map.get(investor_id)
-#                 if investor_info is not None:
-#                     matches.append({
-#                         "investor_id": investor_id,
-#                         "investor_name": investor_info.get('investor_name', 'N/A'),
-#                         "investor_type": investor_info.get('investor_type', 'N/A'), # Add more fields if needed
-#                         "score": analysis_result['score'],
-#                         "reasoning": analysis_result.get('reasoning', 'N/A')
-#                     })
-#                     successful_analyses += 1
-#                 else:
-#                     logging.error(f"Internal Error: Investor info for {investor_id} not found after successful analysis.")
-#                     failed_analyses +=1
-#             else:
-#                 if investor_id in investor_map: # Only count failure if it was a valid investor initially
-#                     logging.warning(f"Failed analysis for investor {investor_id}")
-#                     failed_analyses += 1
-
-#         logging.info(f"Match analysis summary for {founder_id}: {successful_analyses} successful, {failed_analyses} failed/skipped.")
-
-#         # Sort matches by score descending
-#         matches.sort(key=lambda x: x["score"], reverse=True)
-
-#         return matches
-# matching_service.py
-import pandas as pd
-import asyncio
-import logging
-from typing import List, Dict, Optional, Any
-
-# Remove DataLoader import if no longer needed directly
-# from data_loader import DataLoader
-from gemini_client import GeminiClient
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-class MatchingService:
-    """Orchestrates the founder-investor matching process."""
-
-    # Modify __init__ to accept dataframes directly
-    def __init__(self,
-                 founders_df: Optional[pd.DataFrame],
-                 investors_df: Optional[pd.DataFrame],
-                 gemini_client: GeminiClient):
-        self.founders_df = founders_df
-        self.investors_df = investors_df
-        self.gemini_client = gemini_client
-        # Removed: self.data_loader = data_loader
-        # Removed: self.founders_df, self.investors_df = self.data_loader.get_data()
-
-    async def find_matches(self, founder_id: str) -> Optional[List[Dict[str, Any]]]:
-        """Finds, scores, and ranks investor matches for a given founder."""
-
-        # This check should now correctly reflect if data was loaded successfully earlier
-        if self.founders_df is None or self.investors_df is None:
-            logging.error("Data not provided to MatchingService. Cannot find matches.")
-            return None
-        if self.founders_df.empty:
-             logging.warning("Founders DataFrame provided to MatchingService is empty.")
-             # Allow proceeding? Maybe still return None or [] depending on desired behavior
-             return None # Let's return None if no founders to match against
-        if self.investors_df.empty:
-             logging.warning("No investors provided to MatchingService. Cannot perform matching.")
-             return []
-
-        # --- Rest of the find_matches method remains the same ---
-        founder_row = self.founders_df[self.founders_df['startup_id'] == founder_id]
-        if founder_row.empty:
-            logging.error(f"Founder ID {founder_id} not found in provided data.")
-            return None
-
-        founder_data = founder_row.iloc[0]
-        founder_name = founder_data.get('startup_name', founder_id)
-        logging.info(f"--- Starting match process for Founder: {founder_name} ({founder_id}) ---")
-
-        tasks = []
-        investor_map = {}
-
-        for index, investor_data in self.investors_df.iterrows():
-            investor_id = investor_data.get('investor_id')
-            if not investor_id or str(investor_id).strip() == '':
-                 logging.warning(f"Skipping investor row {index} due to invalid ID.")
-                 continue
-
-            investor_id = str(investor_id)
-            investor_map[investor_id] = investor_data
-            prompt = self.gemini_client.create_match_prompt(founder_data, investor_data)
-            tasks.append(self.gemini_client.get_match_analysis(prompt, investor_id))
-
-        if not tasks:
-            logging.warning(f"No valid investors to match against for founder {founder_id}.")
-            return []
-
-        logging.info(f"Sending {len(tasks)} match requests to Gemini API...")
-        results = await asyncio.gather(*tasks)
-        logging.info("Received all Gemini responses.")
-
-        # Process results (logic remains the same)
-        matches = []
-        successful_analyses = 0
-        failed_analyses = 0
-        for inv_id, analysis_result in results:
-            if analysis_result and isinstance(analysis_result.get('score'), int):
-                investor_info = investor_map.get(inv_id)
-                if investor_info is not None:
-                    matches.append({
-                        "investor_id": inv_id,
-                        "investor_name": investor_info.get('investor_name', 'N/A'),
-                        "investor_type": investor_info.get('investor_type', 'N/A'),
-                        "score": analysis_result['score'],
-                        "reasoning": analysis_result.get('reasoning', 'N/A')
-                    })
-                    successful_analyses += 1
-                else:
-                    logging.error(f"Internal Error: Investor info for {inv_id} not found after successful analysis.")
-                    failed_analyses +=1
-            else:
-                if inv_id in investor_map:
-                    logging.warning(f"Failed analysis for investor {inv_id}")
-                    failed_analyses += 1
-
-        logging.info(f"Match analysis summary for {founder_id}: {successful_analyses} successful, {failed_analyses} failed/skipped.")
-
-        matches.sort(key=lambda x: x["score"], reverse=True)
-        return matches
\ No newline at end of file
+# # matching_service.py
+# import pandas as pd
+# import asyncio
+# import logging
+# from typing import List, Dict, Optional, Any
+
+# from data_loader import DataLoader
+# from gemini_client import GeminiClient
+
+# logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# class MatchingService:
+#     """Orchestrates the founder-investor matching process."""
+
+#     def __init__(self, data_loader: DataLoader, gemini_client: GeminiClient):
+#         self.data_loader = data_loader
+#         self.gemini_client = gemini_client
+#         self.founders_df, self.investors_df = self.data_loader.get_data()
+        
+
+#     async def find_matches(self, founder_id: str) -> Optional[List[Dict[str, Any]]]:
+#         """Finds, scores, and ranks investor matches for a given founder."""
+
+#         if self.founders_df is None or self.investors_df is None:
+#             logging.error("Data not loaded in MatchingService. Cannot find matches.")
+#             return None
+#         if self.investors_df.empty:
+#              logging.warning("No investors loaded. Cannot perform matching.")
+#              return []
+
+
+#         founder_row = self.founders_df[self.founders_df['startup_id'] == founder_id]
+#         if founder_row.empty:
+#             logging.error(f"Founder ID {founder_id} not found.")
+#             return None
+
+#         founder_data = founder_row.iloc[0]
+#         founder_name = founder_data.get('startup_name', founder_id)
+#         logging.info(f"--- Starting match process for Founder: {founder_name} ({founder_id}) ---")
+
+#         tasks = []
+#         investor_map = {} # Store investor data for result assembly
+
+#         for index, investor_data in self.investors_df.iterrows():
+#             investor_id = investor_data.get('investor_id')
+#             if not investor_id or str(investor_id).strip() == '':
+#                  logging.warning(f"Skipping investor row {index} due to invalid ID.")
+#                  continue
+
+#             investor_id = str(investor_id)
+#             investor_map[investor_id] = investor_data
+#             prompt = self.gemini_client.create_match_prompt(founder_data, investor_data)
+#             tasks.append(self.gemini_client.get_match_analysis(prompt, investor_id))
+
+#         if not tasks:
+#             logging.warning(f"No valid investors to match against for founder {founder_id}.")
+#             return []
+
+#         logging.info(f"Sending {len(tasks)} match requests to Gemini API...")
+#         results = await asyncio.gather(*tasks)
+#         logging.info("Received all Gemini responses.")
+
+#         # Process results
+#         matches = []
+#         successful_analyses = 0
+#         failed_analyses = 0
+#         for investor_id, analysis_result in results:
+#             if analysis_result and isinstance(analysis_result.get('score'), int):
+#                 investor_info = investor_map.get(investor_id)
+#                 if investor_info is not None:
+#                     matches.append({
+#                         "investor_id": investor_id,
+#                         "investor_name": investor_info.get('investor_name', 'N/A'),
+#                         "investor_type": investor_info.get('investor_type', 'N/A'), # Add more fields if needed
+#                         "score": analysis_result['score'],
+#                         "reasoning": analysis_result.get('reasoning', 'N/A')
+#                     })
+#                     successful_analyses += 1
+#                 else:
+#                     logging.error(f"Internal Error: Investor info for {investor_id} not found after successful analysis.")
+#                     failed_analyses +=1
+#             else:
+#                 if investor_id in investor_map: # Only count failure if it was a valid investor initially
+#                     logging.warning(f"Failed analysis for investor {investor_id}")
+#                     failed_analyses += 1
+
+#         logging.info(f"Match analysis summary for {founder_id}: {successful_analyses} successful, {failed_analyses} failed/skipped.")
+
+#         # Sort matches by score descending
+#         matches.sort(key=lambda x: x["score"], reverse=True)
+
+#         return matches
+# matching_service.py
+import pandas as pd
+import asyncio
+import heapq
+import logging
+import re
+from collections import defaultdict
+from operator import itemgetter
+from typing import List, Dict, Optional, Any
+
+import orjson
+
+import config
+# Remove DataLoader import if no longer needed directly
+# from data_loader import DataLoader
+from gemini_client import GeminiClient
+
+logger = logging.getLogger(__name__)
+
+
+def _chunked(items: list, size: int) -> list:
+    """Splits a list into consecutive chunks of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# Tokenizer for the lexical pre-ranker; short tokens are mostly stopwords
+# and connective noise, so only words of 3+ characters count.
+_WORD_RE = re.compile(r'[a-z0-9]{3,}')
+
+
+def _tokenize(text: str) -> frozenset:
+    """Lowercased 3+ character word tokens of `text`, as a set."""
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+class MatchingService:
+    """Orchestrates the founder-investor matching process."""
+
+    # Modify __init__ to accept dataframes directly
+    def __init__(self,
+                 founders_df: Optional[pd.DataFrame],
+                 investors_df: Optional[pd.DataFrame],
+                 gemini_client: GeminiClient):
+        self.founders_df = founders_df
+        self.investors_df = investors_df
+        self.gemini_client = gemini_client
+        # Removed: self.data_loader = data_loader
+        # Removed: self.founders_df, self.investors_df = self.data_loader.get_data()
+
+        # Index founders by ID so per-founder lookups are O(1) .loc hits rather
+        # than boolean scans. DataLoader already ships the frame indexed, so
+        # this is a no-op in the normal path; drop=False keeps the column.
+        if (self.founders_df is not None and 'startup_id' in self.founders_df.columns
+                and self.founders_df.index.name != 'startup_id'):
+            self.founders_df = self.founders_df.set_index('startup_id', drop=False)
+
+        # Keep only the investor columns the prompts and filters actually read.
+        # Narrower rows mean less data materialized per row by to_dict('records')
+        # and itertuples, and smaller copies everywhere downstream.
+        if self.investors_df is not None and 'investor_id' in self.investors_df.columns:
+            needed = [c for c in gemini_client.prompt_columns if c in self.investors_df.columns]
+            if len(needed) < len(self.investors_df.columns):
+                self.investors_df = self.investors_df[needed].copy()
+
+        # The investor table is fixed for the life of the service while
+        # find_matches runs once per founder, so pay the ID normalization and
+        # records conversion once here instead of on every call.
+        self._valid_investors_df: Optional[pd.DataFrame] = None
+        self._investor_records: List[Dict[str, Any]] = []
+        self._investor_index: Dict[str, Dict[str, Any]] = {}
+        if (self.investors_df is not None and not self.investors_df.empty
+                and 'investor_id' in self.investors_df.columns):
+            ids = self.investors_df['investor_id'].astype(str).str.strip()
+            valid = ids.ne('')
+            skipped = int((~valid).sum())
+            if skipped > 0:
+                logger.warning(f"Skipped {skipped} investor rows due to invalid IDs.")
+            self._valid_investors_df = self.investors_df.loc[valid].assign(investor_id=ids[valid])
+            self._investor_records = self._valid_investors_df.to_dict('records')
+            self._investor_index = dict(zip(self._valid_investors_df['investor_id'],
+                                            self._investor_records))
+
+        # Token sets for the lexical pre-ranker, built once per instance from
+        # the investor text fields that describe what they want to fund.
+        self._investor_tokens: Dict[str, frozenset] = {}
+        if self._valid_investors_df is not None:
+            text_cols = [c for c in ('preferred_industries', 'investment_thesis',
+                                     'preferred_stages', 'geographic_focus')
+                         if c in self._valid_investors_df.columns]
+            if text_cols:
+                joined = self._valid_investors_df[text_cols].astype(str).agg(' '.join, axis=1)
+                self._investor_tokens = {investor_id: _tokenize(text)
+                                         for investor_id, text
+                                         in zip(self._valid_investors_df['investor_id'], joined)}
+
+    def export_batch_requests(self, founder_ids: List[str], path: str) -> int:
+        """Writes one JSONL request per (founder, investor) pair for offline batch scoring.
+
+        Bulk workloads (nightly re-scoring, whole-portfolio runs) are not
+        latency-bound, and provider batch endpoints trade a multi-hour SLA for
+        roughly half the token cost. The installed SDK has no batch-submission
+        client, so this emits the provider-neutral request file (custom_id +
+        prompt) those jobs consume; import_batch_results maps the completed
+        output back into the usual match-dict shape. Returns the request count."""
+        count = 0
+        with open(path, 'wb') as out:
+            for founder_id in founder_ids:
+                try:
+                    founder_row = self.founders_df.loc[founder_id]
+                except KeyError:
+                    logger.warning(f"Founder ID {founder_id} not found; skipping in batch export.")
+                    continue
+                if isinstance(founder_row, pd.DataFrame):
+                    founder_row = founder_row.iloc[0]
+                founder_data = founder_row.to_dict()
+                for investor_id, prompt in self.gemini_client.build_prompts_vectorized(
+                        founder_data, self._prefilter_investors(founder_data)):
+                    out.write(orjson.dumps({"custom_id": f"{founder_id}|{investor_id}",
+                                            "prompt": prompt}) + b"\n")
+                    count += 1
+        logger.info(f"Exported {count} batch requests for {len(founder_ids)} founders to {path}.")
+        return count
+
+    def import_batch_results(self, path: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Parses completed batch output JSONL into ranked match lists per founder.
+
+        Expects one object per line with custom_id ('founder_id|investor_id'),
+        score and reasoning; malformed lines are logged and skipped."""
+        investor_map = self._investor_index
+
+        matches_by_founder: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        with open(path, 'rb') as results_file:
+            for line in results_file:
+                if not line.strip():
+                    continue
+                try:
+                    item = orjson.loads(line)
+                    founder_id, investor_id = str(item['custom_id']).split('|', 1)
+                    score = item['score']
+                except (orjson.JSONDecodeError, KeyError, ValueError) as e:
+                    logger.warning(f"Skipping malformed batch result line: {e}")
+                    continue
+                if not isinstance(score, int):
+                    logger.warning(f"Skipping batch result with non-integer score for {item.get('custom_id')}.")
+                    continue
+                investor_info = investor_map.get(investor_id, {})
+                matches_by_founder[founder_id].append({
+                    "investor_id": investor_id,
+                    "investor_name": investor_info.get('investor_name', 'N/A'),
+                    "investor_type": investor_info.get('investor_type', 'N/A'),
+                    "score": score,
+                    "reasoning": item.get('reasoning', 'N/A')
+                })
+
+        for founder_matches in matches_by_founder.values():
+            founder_matches.sort(key=itemgetter('score'), reverse=True)
+        return dict(matches_by_founder)
+
+    def _prefilter_investors(self, founder_data: Dict[str, Any],
+                             top_n: Optional[int] = None) -> pd.DataFrame:
+        """Drops investors with obvious structural mismatches before any LLM calls.
+
+        Keeps investors whose investment range plausibly covers the founder's
+        funding ask and whose preferred stages mention the founder's stage.
+        Falls back to the full set when the needed columns are missing or the
+        filter would leave fewer candidates than the caller's top_n (at least
+        DEFAULT_TOP_N), so the user never gets fewer matches than asked for
+        just because the filter was aggressive."""
+        df = self._valid_investors_df if self._valid_investors_df is not None else self.investors_df
+        if not config.PREFILTER_INVESTORS:
+            return df
+        if not {'min_investment_usd', 'max_investment_usd', 'preferred_stages'}.issubset(df.columns):
+            return df
+        try:
+            funding = float(founder_data.get('funding_required_usd') or 0)
+        except (TypeError, ValueError):
+            return df
+        if funding <= 0:
+            return df
+
+        min_inv = pd.to_numeric(df['min_investment_usd'], errors='coerce').fillna(0)
+        max_inv = pd.to_numeric(df['max_investment_usd'], errors='coerce').fillna(0)
+        # Allow investors whose ceiling covers at least half the ask; partial
+        # rounds are common enough that a hard cutoff would over-prune.
+        mask = (min_inv <= funding) & (max_inv >= funding * 0.5)
+
+        stage = str(founder_data.get('startup_stage', '')).strip()
+        if stage:
+            mask &= df['preferred_stages'].astype(str).str.contains(stage, case=False, regex=False)
+
+        filtered = df[mask]
+        if len(filtered) < max(top_n or 0, config.DEFAULT_TOP_N):
+            logger.info(f"Prefilter left only {len(filtered)} candidates; using the full investor set.")
+            return df
+        logger.info(f"Prefilter kept {len(filtered)}/{len(df)} investors for LLM scoring.")
+        return filtered
+
+    def _prerank_investors(self, founder_data: Dict[str, Any],
+                           candidates_df: pd.DataFrame,
+                           top_n: Optional[int] = None) -> pd.DataFrame:
+        """Ranks candidates by cheap lexical similarity and keeps only the top K.
+
+        With a large investor table and a small display limit, most LLM calls
+        score investors the user will never see. A token-overlap cosine between
+        the founder's description and each investor's preferences is a few
+        microseconds per pair and prunes the field to K = PRERANK_MULTIPLIER x
+        the effective top_n before any tokens are spent, so the LLM always has
+        a multiple of the displayed count to rerank. Disabled via
+        PRERANK_INVESTORS=0, and a no-op when the field is already small."""
+        limit = config.PRERANK_MULTIPLIER * max(top_n or 0, config.DEFAULT_TOP_N)
+        if (not config.PRERANK_INVESTORS or not self._investor_tokens
+                or len(candidates_df) <= limit):
+            return candidates_df
+
+        founder_text = ' '.join(str(founder_data.get(col) or '')
+                                for col in ('industry', 'startup_stage', 'business_model',
+                                            'product_description', 'usp', 'location_country'))
+        founder_tokens = _tokenize(founder_text)
+        if not founder_tokens:
+            return candidates_df
+
+        def _similarity(investor_id: str) -> float:
+            tokens = self._investor_tokens.get(investor_id)
+            if not tokens:
+                return 0.0
+            # Cosine over binary term vectors: shared / sqrt(|a| * |b|).
+            return len(founder_tokens & tokens) / (len(founder_tokens) * len(tokens)) ** 0.5
+
+        similarity = candidates_df['investor_id'].map(_similarity)
+        kept = candidates_df.loc[similarity.nlargest(limit).index]
+        logger.info(f"Pre-ranking kept {len(kept)}/{len(candidates_df)} investors for LLM scoring.")
+        return kept
+
+    async def _contained(self, coro, investor_ids: List[str]):
+        """Absorbs a scoring task's exceptions into per-investor failures.
+
+        A raising task is converted into failed results instead of cancelling
+        the rest of the fan-out, so partial progress survives and already-spent
+        tokens are not wasted on a full re-fire. Hung calls are bounded by the
+        per-call timeout inside the client, where the clock starts only once a
+        concurrency slot is held — a task-level timeout here would count queue
+        wait behind the semaphore/rate limiter against the budget and fail the
+        tail of any large fan-out."""
+        try:
+            return await coro
+        except Exception as e:
+            logger.warning(f"Scoring task failed for investors {investor_ids}: {e!r}")
+        return [(investor_id, None) for investor_id in investor_ids]
+
+    async def find_matches(self, founder_id: str,
+                           progress_callback=None,
+                           on_match=None,
+                           top_n: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Finds, scores, and ranks investor matches for a given founder.
+
+        top_n, if given, limits the returned list to the highest-scoring N
+        matches (selected with a heap rather than a full sort).
+        progress_callback, if given, is called as (completed, total) requests
+        finish so callers can surface incremental progress. on_match, if given,
+        is called with (match, matches_so_far) for every successful analysis as
+        it lands, letting callers stream a scoreboard instead of waiting for
+        the slowest response."""
+
+        # This check should now correctly reflect if data was loaded successfully earlier
+        if self.founders_df is None or self.investors_df is None:
+            logger.error("Data not provided to MatchingService. Cannot find matches.")
+            return None
+        if self.founders_df.empty:
+             logger.warning("Founders DataFrame provided to MatchingService is empty.")
+             # Allow proceeding? Maybe still return None or [] depending on desired behavior
+             return None # Let's return None if no founders to match against
+        if self.investors_df.empty:
+             logger.warning("No investors provided to MatchingService. Cannot perform matching.")
+             return []
+
+        try:
+            founder_row = self.founders_df.loc[founder_id] # O(1) indexed lookup
+        except KeyError:
+            logger.error(f"Founder ID {founder_id} not found in provided data.")
+            return None
+        if isinstance(founder_row, pd.DataFrame): # duplicate IDs: take the first
+            founder_row = founder_row.iloc[0]
+
+        founder_data = founder_row.to_dict() # plain dict: avoids Series lookups in the loop below
+        founder_name = founder_data.get('startup_name', founder_id)
+        logger.info(f"--- Starting match process for Founder: {founder_name} ({founder_id}) ---")
+
+        # Cheap structural pruning first: no point paying an LLM call for an
+        # investor whose range or stage preferences rule the founder out.
+        candidates_df = self._prefilter_investors(founder_data, top_n)
+        # Then rank what survives by lexical fit and cap the field, so LLM
+        # spend scales with the display limit rather than the table size.
+        candidates_df = self._prerank_investors(founder_data, candidates_df, top_n)
+
+        # IDs were normalized and converted to records once at construction;
+        # reuse the precomputed index, narrowing only when the prefilter did.
+        if candidates_df is self._valid_investors_df:
+            investor_map = self._investor_index
+        else:
+            investor_map = {investor_id: self._investor_index[investor_id]
+                            for investor_id in candidates_df['investor_id']
+                            if investor_id in self._investor_index}
+
+        if not investor_map:
+            logger.warning(f"No valid investors to match against for founder {founder_id}.")
+            return []
+
+        batch_size = max(1, config.MATCH_BATCH_SIZE)
+        if batch_size > 1:
+            # Amortize one network round trip over each chunk of investors.
+            founder_header = self.gemini_client.build_founder_header(founder_data)
+            chunks = _chunked(list(investor_map.items()), batch_size)
+            tasks = [self._contained(
+                         self.gemini_client.get_match_analysis_batch(founder_header, founder_name, chunk),
+                         [investor_id for investor_id, _ in chunk])
+                     for chunk in chunks]
+            logger.info(f"Sending {len(tasks)} batched match requests ({len(investor_map)} investors) to Gemini API...")
+        else:
+            # Single-pair fallback path; prompt construction is deferred into
+            # the client so cache hits never pay the string formatting.
+            founder_header = self.gemini_client.build_founder_header(founder_data)
+            tasks = [self._contained(
+                         self.gemini_client.get_match_analysis_pair(
+                             founder_header, founder_name, record, investor_id),
+                         [investor_id])
+                     for investor_id, record in investor_map.items()]
+            logger.info(f"Sending {len(tasks)} match requests to Gemini API...")
+
+        # Consume responses as they land instead of blocking on the slowest
+        # request, assembling matches incrementally so progress and partial
+        # standings can be surfaced while the tail is still running.
+        matches = []
+        successful_analyses = 0
+        failed_analyses = 0
+        failed_investor_ids: List[str] = []
+        total = len(tasks)
+        for completed, future in enumerate(asyncio.as_completed(tasks), start=1):
+            outcome = await future
+            # Batch tasks yield a list of pairs; single-pair tasks yield one pair.
+            for inv_id, analysis_result in (outcome if isinstance(outcome, list) else [outcome]):
+                if analysis_result and isinstance(analysis_result.get('score'), int):
+                    investor_info = investor_map.get(inv_id)
+                    if investor_info is not None:
+                        match = {
+                            "investor_id": inv_id,
+                            "investor_name": investor_info.get('investor_name', 'N/A'),
+                            "investor_type": investor_info.get('investor_type', 'N/A'),
+                            "score": analysis_result['score'],
+                            "reasoning": analysis_result.get('reasoning', 'N/A')
+                        }
+                        matches.append(match)
+                        successful_analyses += 1
+                        if on_match is not None:
+                            on_match(match, matches)
+                    else:
+                        logger.error(f"Internal Error: Investor info for {inv_id} not found after successful analysis.")
+                        failed_analyses +=1
+                else:
+                    if inv_id in investor_map:
+                        logger.warning(f"Failed analysis for investor {inv_id}")
+                        failed_analyses += 1
+                        failed_investor_ids.append(inv_id)
+            if progress_callback is not None:
+                progress_callback(completed, total)
+        logger.info("Received all Gemini responses.")
+
+        logger.info(f"Match analysis summary for {founder_id}: {successful_analyses} successful, {failed_analyses} failed/skipped.")
+        if failed_investor_ids:
+            # One place to grab the IDs for a targeted re-run instead of
+            # re-firing the whole fan-out.
+            logger.warning(f"Investors without a score for {founder_id}: {failed_investor_ids}")
+        if successful_analyses == 0 and failed_analyses > 0:
+            # Every analysis failing means Gemini was down or throttled, not
+            # that no investor fits; raise so callers treat it as an error
+            # instead of memoizing an empty result (e.g. for the app's
+            # hour-long match cache).
+            raise RuntimeError(f"All {failed_analyses} match analyses failed for founder {founder_id}.")
+
+        # itemgetter is a C-level key callable; nlargest is O(N log K) vs the
+        # full sort's O(N log N) when the caller only wants the top few.
+        if top_n is not None:
+            return heapq.nlargest(top_n, matches, key=itemgetter('score'))
+        matches.sort(key=itemgetter('score'), reverse=True)
+        return matches
+
+    async def find_matches_many(self, founder_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Scores several founders concurrently in one flattened fan-out.
+
+        Awaiting find_matches per founder serializes the founders even though
+        each founder's own calls overlap; flattening every (founder, chunk)
+        task into a single gather overlaps Gemini latency across founders too,
+        so wallclock approaches the slowest founder rather than the sum. The
+        client's shared semaphore and rate limiter still bound total load.
+        Returns a dict of founder_id -> ranked match list; unknown founder IDs
+        are logged and omitted."""
+        if self.founders_df is None or self.investors_df is None:
+            logger.error("Data not provided to MatchingService. Cannot find matches.")
+            return {}
+
+        batch_size = max(1, config.MATCH_BATCH_SIZE)
+        tasks = []
+        task_founders: List[str] = []  # parallel to tasks; gather keeps order
+        investor_maps: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for founder_id in founder_ids:
+            try:
+                founder_row = self.founders_df.loc[founder_id]
+            except KeyError:
+                logger.warning(f"Founder ID {founder_id} not found; skipping in multi-founder run.")
+                continue
+            if isinstance(founder_row, pd.DataFrame):
+                founder_row = founder_row.iloc[0]
+            founder_data = founder_row.to_dict()
+            founder_name = founder_data.get('startup_name', founder_id)
+
+            candidates_df = self._prerank_investors(
+                founder_data, self._prefilter_investors(founder_data))
+            if candidates_df is self._valid_investors_df:
+                investor_map = self._investor_index
+            else:
+                investor_map = {investor_id: self._investor_index[investor_id]
+                                for investor_id in candidates_df['investor_id']
+                                if investor_id in self._investor_index}
+            if not investor_map:
+                logger.warning(f"No valid investors to match against for founder {founder_id}.")
+                continue
+            investor_maps[founder_id] = investor_map
+
+            if batch_size > 1:
+                founder_header = self.gemini_client.build_founder_header(founder_data)
+                for chunk in _chunked(list(investor_map.items()), batch_size):
+                    tasks.append(self._contained(
+                        self.gemini_client.get_match_analysis_batch(founder_header, founder_name, chunk),
+                        [investor_id for investor_id, _ in chunk]))
+                    task_founders.append(founder_id)
+            else:
+                founder_header = self.gemini_client.build_founder_header(founder_data)
+                for investor_id, record in investor_map.items():
+                    tasks.append(self._contained(
+                        self.gemini_client.get_match_analysis_pair(
+                            founder_header, founder_name, record, investor_id),
+                        [investor_id]))
+                    task_founders.append(founder_id)
+
+        logger.info(f"Sending {len(tasks)} match requests for {len(investor_maps)} founders to Gemini API...")
+        results = await asyncio.gather(*tasks)
+
+        matches_by_founder: Dict[str, List[Dict[str, Any]]] = {fid: [] for fid in investor_maps}
+        for founder_id, outcome in zip(task_founders, results):
+            investor_map = investor_maps[founder_id]
+            for inv_id, analysis_result in (outcome if isinstance(outcome, list) else [outcome]):
+                if analysis_result and isinstance(analysis_result.get('score'), int):
+                    investor_info = investor_map.get(inv_id)
+                    if investor_info is None:
+                        continue
+                    matches_by_founder[founder_id].append({
+                        "investor_id": inv_id,
+                        "investor_name": investor_info.get('investor_name', 'N/A'),
+                        "investor_type": investor_info.get('investor_type', 'N/A'),
+                        "score": analysis_result['score'],
+                        "reasoning": analysis_result.get('reasoning', 'N/A')
+                    })
+                elif inv_id in investor_map:
+                    logger.warning(f"Failed analysis for investor {inv_id} (founder {founder_id})")
+
+        for founder_matches in matches_by_founder.values():
+            founder_matches.sort(key=itemgetter('score'), reverse=True)
+        return matches_by_founder
\ No newline at end of file